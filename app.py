@@ -12,11 +12,27 @@ import serial.tools.list_ports
 import time
 from datetime import datetime
 import threading
+import atexit
+import signal
+import sys
+import hmac
 import json
 import re
 import subprocess
+import os
+import shlex
+import socket
+import gzip
+import zlib
+import math
+import base64
+import itertools
+from collections import deque
 import numpy as np
-from ultralytics import YOLO
+try:
+    from ultralytics import YOLO
+except ImportError:
+    YOLO = None
 import requests
 
 app = Flask(__name__)
@@ -39,14 +55,60 @@ detection_logs = []
 arduino = None
 arduino_port = None
 
-# Camera instance
-camera = None
+# Camera process (owned by the camera supervisor thread)
 camera_process = None
 
+# Camera supervisor configuration
+CAMERA_WATCHDOG_INTERVAL = 0.5  # Seconds between watchdog checks
+CAMERA_STALL_TIMEOUT = 5.0  # Restart if no frame arrives for this long
+CAMERA_BACKOFF_INITIAL = 1.0  # First restart delay in seconds
+CAMERA_BACKOFF_MAX = 30.0  # Restart delay cap
+CAMERA_BACKOFF_RESET = 60.0  # Runs longer than this reset the backoff
+
+# Camera supervisor state
+camera_stats = {
+    "state": "stopped",
+    "restarts": 0,
+    "frames": 0,
+    "started_at": None,
+    "last_frame_time": None,
+    "last_error": None,
+    "backoff": None
+}
+camera_stderr_tail = deque(maxlen=20)
+camera_stop_event = threading.Event()
+
+# Latest frame shared by all stream viewers
+latest_jpeg = None
+latest_frame_id = 0
+camera_frame_condition = threading.Condition()
+
+# Latest frame after person detection, forwarded as-is to stream viewers
+annotated_jpeg = None
+annotated_frame_id = 0
+annotated_frame_condition = threading.Condition()
+
 # YOLO model for person detection
 yolo_model = None
 person_count = 0
 previous_person_count = 0
+DETECT_IMGSZ = 480  # Whole-frame inference size (smaller for lower latency)
+inference_pixels = 0  # Model input pixels (after letterboxing) for the last frame
+inference_mode = "full_frame"  # "zones" when only zone tiles were inferred
+
+# Region-of-interest zones (see load_zones); empty = whole-frame detection
+CAMERA_ID = os.environ.get('VIGIL_CAMERA_ID', 'pi_camera')
+ZONES_FILE = os.environ.get('VIGIL_ZONES_FILE', 'zones.json')
+ZONE_TILE_SIZE = 320  # Max crop size fed to YOLO, also the inference imgsz
+ZONE_TILE_OVERLAP = 64  # Overlap between tiles of large zones
+ZONE_PERSON_HEIGHT = 0.35  # Context above a zone for the body (fraction of frame height)
+ZONE_PADDING = 0.05  # Context on the other sides of a zone (fraction of frame size)
+ZONE_FULL_FRAME_COVERAGE = 0.75  # Use whole-frame inference when zones cover this much of the frame
+zones = []
+zone_plan_cache = {}  # (width, height) -> (tiles or None, model pixels)
+zone_counts = {}
+previous_zone_counts = {}
+zone_alert_state = {}
 
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = "8466970568:AAHbWgIEzGKsCZto38IcqmZ4wG4yAslcgNg"
@@ -55,6 +117,39 @@ TELEGRAM_ENABLED = True  # Enabled with existing credentials
 last_alert_time = 0
 alert_cooldown = 30  # Seconds between alerts (prevents spam)
 
+# Node identity (each patrol bot runs its own dashboard)
+PORT = int(os.environ.get('VIGIL_PORT', '8080'))
+NODE_ID = os.environ.get('VIGIL_NODE_ID') or socket.gethostname()
+PUBLIC_URL = os.environ.get('VIGIL_PUBLIC_URL')  # Set in __main__ if not configured
+
+# Fleet relay: set VIGIL_AGGREGATOR_URL to stream this node to a central dashboard
+FLEET_AGGREGATOR_URL = os.environ.get('VIGIL_AGGREGATOR_URL', '').rstrip('/')
+FLEET_TOKEN = os.environ.get('VIGIL_FLEET_TOKEN', '')  # Shared secret, optional
+FLEET_SAMPLE_INTERVAL = 1.0  # Seconds between telemetry samples
+FLEET_BATCH_INTERVAL = 5.0  # Seconds between batches sent to the aggregator
+FLEET_BATCH_MAX = 500  # Max items per batch
+FLEET_BACKOFF_MAX = 60.0  # Max retry delay while the aggregator is unreachable
+FLEET_THUMBNAIL_INTERVAL = 10.0  # Seconds between thumbnail frames
+FLEET_THUMBNAIL_SIZE = (160, 120)
+FLEET_OUTBOX_MAX = 5000  # Store-and-forward buffer (~1h of telemetry at 1 Hz)
+FLEET_BOOT_ID = f"{int(time.time() * 1000)}"
+
+fleet_outbox = deque(maxlen=FLEET_OUTBOX_MAX)
+fleet_seq = 0
+fleet_lock = threading.Lock()
+fleet_status = {"connected": False, "last_sent": None, "last_error": None}
+
+# Fleet aggregator: per-node view merged from incoming batches
+FLEET_AGGREGATOR = os.environ.get('VIGIL_FLEET_AGGREGATOR') == '1'  # Accept /api/fleet/ingest
+FLEET_NODE_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+FLEET_MAX_REQUEST_BYTES = 2 * 1024 * 1024  # Compressed batch size limit
+FLEET_MAX_BATCH_BYTES = 8 * 1024 * 1024  # Decompressed batch size limit (gzip bombs)
+app.config['MAX_CONTENT_LENGTH'] = FLEET_MAX_REQUEST_BYTES
+FLEET_NODE_TELEMETRY_MAX = 300  # Samples kept per node
+FLEET_NODE_EVENTS_MAX = 50  # Events kept per node
+FLEET_NODE_OFFLINE_AFTER = 30.0  # Seconds without a batch before a node shows offline
+fleet_nodes = {}
+
 def find_arduino_port():
     """Find Arduino UNO R4 WiFi port"""
     global arduino_port
@@ -144,6 +239,9 @@ def read_arduino_sensors():
     """Thread function to continuously read sensor data from Arduino"""
     global sensor_data, detection_logs, arduino
     
+    # Hazards last many serial lines; only relay a fleet event when they change
+    last_relayed_detection = None
+    
     while True:
         if arduino and arduino.is_open:
             try:
@@ -184,6 +282,11 @@ def read_arduino_sensors():
                             detection_logs.insert(0, log_entry)
                             if len(detection_logs) > 10:
                                 detection_logs.pop()
+                            if log_entry["detection"] != last_relayed_detection:
+                                fleet_enqueue("event", log_entry)
+                                last_relayed_detection = log_entry["detection"]
+                        else:
+                            last_relayed_detection = None
                 else:
                     time.sleep(0.1)
             except Exception as e:
@@ -197,6 +300,10 @@ def read_arduino_sensors():
 def init_yolo():
     """Initialize YOLOv8 model for person detection"""
     global yolo_model
+    if YOLO is None:
+        print("⚠️  ultralytics not installed")
+        print("   Continuing without YOLO detection...")
+        return
     try:
         # Load YOLOv8 model (will download if not available)
         # Using 'yolov8n.pt' for faster inference (nano model)
@@ -231,41 +338,251 @@ def send_telegram_alert(message):
         print(f"⚠️  Telegram alert error: {e}")
         return False
 
+def load_zones():
+    """Load region-of-interest zones for this camera from ZONES_FILE
+    Format: {"<camera_id>": [{"name": "gate", "points": [[x, y], ...], "alert_min": 1}]}
+    Points are fractions of the frame width/height (0.0 - 1.0).
+    """
+    global zones, zone_counts
+    if not os.path.exists(ZONES_FILE):
+        return
+    try:
+        with open(ZONES_FILE) as f:
+            config = json.load(f)
+        loaded = []
+        for zone in config.get(CAMERA_ID, []):
+            points = [(float(x), float(y)) for x, y in zone["points"]]
+            if len(points) < 3:
+                raise ValueError(f"Zone '{zone.get('name')}' needs at least 3 points")
+            loaded.append({
+                "name": str(zone["name"]),
+                "points": points,
+                "alert": bool(zone.get("alert", True)),
+                "alert_min": int(zone.get("alert_min", 1))
+            })
+        zones = loaded
+        zone_plan_cache.clear()
+        zone_counts = {zone["name"]: 0 for zone in zones}
+        if zones:
+            print(f"✅ Loaded {len(zones)} detection zone(s) for {CAMERA_ID} from {ZONES_FILE}")
+    except Exception as e:
+        print(f"⚠️  Zone config error: {e}")
+        print("   Continuing with whole-frame detection...")
+        zones = []
+        zone_counts = {}
+
+def zone_polygons(width, height):
+    """Zone polygons in pixel coordinates for a frame of the given size"""
+    return [
+        np.array([(int(x * width), int(y * height)) for x, y in zone["points"]], dtype=np.int32)
+        for zone in zones
+    ]
+
+def tile_spans(start, length, limit):
+    """Split [start, start + length) into ZONE_TILE_SIZE spans overlapping by ZONE_TILE_OVERLAP
+    Short ranges are widened to a full tile (within [0, limit)) so every crop has the same
+    size, which YOLO then infers at native resolution without rescaling.
+    """
+    size = min(ZONE_TILE_SIZE, limit)
+    if length <= size:
+        tile_start = min(max(start + length // 2 - size // 2, 0), limit - size)
+        return [(tile_start, tile_start + size)]
+    step = size - ZONE_TILE_OVERLAP
+    spans = [(s, s + size) for s in range(start, start + length - size, step)]
+    spans.append((start + length - size, start + length))
+    return spans
+
+def zone_rects(polygons, width, height):
+    """Padded zone bounding boxes (x1, y1, x2, y2), with overlapping boxes merged
+    People are assigned by their feet, so each box gets room above it for the
+    rest of the body (ZONE_PERSON_HEIGHT) and a ZONE_PADDING margin elsewhere.
+    """
+    pad_x = int(ZONE_PADDING * width)
+    pad_y = int(ZONE_PADDING * height)
+    pad_up = int(ZONE_PERSON_HEIGHT * height)
+    rects = []
+    for polygon in polygons:
+        x, y, w, h = cv2.boundingRect(polygon)
+        x1, y1 = max(x - pad_x, 0), max(y - pad_up, 0)
+        x2, y2 = min(x + w + pad_x, width), min(y + h + pad_y, height)
+        if x2 > x1 and y2 > y1:
+            rects.append((x1, y1, x2, y2))
+    
+    # Merge overlapping boxes so shared areas are only inferred once
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return rects
+
+def zone_tiles(polygons, width, height):
+    """Crop rectangles (x1, y1, x2, y2) covering every zone, all ZONE_TILE_SIZE square"""
+    tiles = []
+    for x1, y1, x2, y2 in zone_rects(polygons, width, height):
+        for ty1, ty2 in tile_spans(y1, y2 - y1, height):
+            for tx1, tx2 in tile_spans(x1, x2 - x1, width):
+                if (tx1, ty1, tx2, ty2) not in tiles:
+                    tiles.append((tx1, ty1, tx2, ty2))
+    return tiles
+
+def letterboxed_pixels(width, height, imgsz):
+    """Model input pixels for an image letterboxed to imgsz (rectangular, stride 32) like YOLO does"""
+    scale = imgsz / max(width, height)
+    padded_w = int(np.ceil(round(width * scale) / 32) * 32)
+    padded_h = int(np.ceil(round(height * scale) / 32) * 32)
+    return padded_w * padded_h
+
+def plan_zone_inference(width, height):
+    """Pick zone tiles or the whole frame for this frame size
+    Zones are tiled at native resolution unless their padded boxes cover at least
+    ZONE_FULL_FRAME_COVERAGE of the frame, where a whole-frame pass is the better deal.
+    Returns (tiles, model_pixels); tiles is None for whole-frame inference.
+    """
+    plan = zone_plan_cache.get((width, height))
+    if plan is None:
+        polygons = zone_polygons(width, height)
+        covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in zone_rects(polygons, width, height))
+        tiles = zone_tiles(polygons, width, height)
+        if tiles and covered < ZONE_FULL_FRAME_COVERAGE * width * height:
+            tile_w, tile_h = tiles[0][2] - tiles[0][0], tiles[0][3] - tiles[0][1]
+            plan = (tiles, len(tiles) * letterboxed_pixels(tile_w, tile_h, ZONE_TILE_SIZE))
+        else:
+            plan = (None, letterboxed_pixels(width, height, DETECT_IMGSZ))
+        zone_plan_cache[(width, height)] = plan
+    return plan
+
+def run_person_inference(frame):
+    """Run YOLO on the whole frame, or on the zone tiles batched into one model call
+    Returns person boxes (x1, y1, x2, y2, confidence) in frame coordinates.
+    """
+    global inference_pixels, inference_mode
+    height, width = frame.shape[:2]
+    
+    tiles = None
+    if zones:
+        tiles, model_pixels = plan_zone_inference(width, height)
+    
+    if tiles is not None:
+        crops = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        results = yolo_model(crops, classes=[0], verbose=False, imgsz=ZONE_TILE_SIZE)
+        offsets = [(x1, y1) for x1, y1, x2, y2 in tiles]
+        inference_pixels = model_pixels
+        inference_mode = "zones"
+    else:
+        # Run YOLO inference (smaller imgsz for lower latency)
+        results = yolo_model(frame, classes=[0], verbose=False, imgsz=DETECT_IMGSZ)  # class 0 = person
+        offsets = [(0, 0)]
+        inference_pixels = model_pixels if zones else letterboxed_pixels(width, height, DETECT_IMGSZ)
+        inference_mode = "full_frame"
+    
+    boxes = []
+    for result, (ox, oy) in zip(results, offsets):
+        for box in result.boxes:
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            confidence = float(box.conf[0].cpu().numpy())
+            # Only keep if confidence > 0.5
+            if confidence > 0.5:
+                boxes.append((x1 + ox, y1 + oy, x2 + ox, y2 + oy, confidence))
+    
+    if len(offsets) > 1 and len(boxes) > 1:
+        # Overlapping tiles can see the same person twice
+        rects = [[int(x1), int(y1), int(x2 - x1), int(y2 - y1)] for x1, y1, x2, y2, c in boxes]
+        keep = cv2.dnn.NMSBoxes(rects, [c for *_, c in boxes], 0.5, 0.45)
+        boxes = [boxes[i] for i in np.array(keep).flatten()]
+    return boxes
+
+def check_zone_alerts(current_time):
+    """Send Telegram alerts for zones whose person count crosses their alert_min"""
+    for zone in zones:
+        if not zone["alert"]:
+            continue
+        name = zone["name"]
+        count = zone_counts.get(name, 0)
+        state = zone_alert_state.setdefault(name, {"active": False, "last_alert": 0})
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        if count >= zone["alert_min"] and not state["active"]:
+            if current_time - state["last_alert"] < alert_cooldown:
+                continue
+            message = f"🚨 <b>Person in Zone: {name}</b>\n\n"
+            message += f"👥 <b>Count:</b> {count} person(s)\n"
+            message += f"🕐 <b>Time:</b> {timestamp}\n"
+            message += f"📍 <b>Location:</b> VigilSense Monitoring Area ({NODE_ID})\n\n"
+            message += f"⚠️ Check live feed: {PUBLIC_URL}"
+            
+            state["active"] = True
+            if send_telegram_alert(message):
+                print(f"✅ Telegram alert sent: {count} person(s) in zone {name}")
+                state["last_alert"] = current_time
+            else:
+                print(f"⚠️  Failed to send Telegram alert")
+        elif count < zone["alert_min"] and state["active"]:
+            message = f"✅ <b>Zone Clear: {name}</b>\n\n"
+            message += f"👥 <b>Count:</b> {count} person(s)\n"
+            message += f"🕐 <b>Time:</b> {timestamp}\n"
+            message += f"📍 <b>Location:</b> VigilSense Monitoring Area ({NODE_ID})"
+            
+            state["active"] = False
+            if send_telegram_alert(message):
+                print(f"✅ Telegram alert sent: Zone {name} cleared")
+
 def detect_people(frame):
-    """Detect people in frame using YOLOv8 and draw bounding boxes"""
-    global person_count, yolo_model, previous_person_count, last_alert_time, alert_cooldown
+    """Detect people in frame (or in its zones) using YOLOv8 and draw bounding boxes"""
+    global person_count, yolo_model, previous_person_count, previous_zone_counts, last_alert_time, alert_cooldown, zone_counts
     
     if yolo_model is None:
         return frame
     
     try:
-        # Run YOLO inference (smaller imgsz for lower latency)
-        results = yolo_model(frame, classes=[0], verbose=False, imgsz=480)  # class 0 = person
-        
-        person_count = 0
+        boxes = run_person_inference(frame)
         
-        # Draw bounding boxes and count people
-        for result in results:
-            boxes = result.boxes
+        if zones:
+            # A person belongs to a zone when their feet (bottom-center of the box) are inside it
+            polygons = zone_polygons(frame.shape[1], frame.shape[0])
+            counts = {zone["name"]: 0 for zone in zones}
+            in_zones = []
             for box in boxes:
-                # Get box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = box.conf[0].cpu().numpy()
-                
-                # Only draw if confidence > 0.5
-                if confidence > 0.5:
-                    person_count += 1
-                    
-                    # Draw bounding box
-                    cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-                    
-                    # Draw label with confidence
-                    label = f"Person {confidence:.2f}"
-                    label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                    cv2.rectangle(frame, (int(x1), int(y1) - label_size[1] - 10),
-                                (int(x1) + label_size[0], int(y1)), (0, 255, 0), -1)
-                    cv2.putText(frame, label, (int(x1), int(y1) - 5),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+                foot = (float((box[0] + box[2]) / 2), float(box[3]))
+                inside = False
+                for zone, polygon in zip(zones, polygons):
+                    if cv2.pointPolygonTest(polygon, foot, False) >= 0:
+                        counts[zone["name"]] += 1
+                        inside = True
+                if inside:
+                    in_zones.append(box)
+            boxes = in_zones
+            zone_counts = counts
+            
+            # Draw zone outlines with their counts
+            for zone, polygon in zip(zones, polygons):
+                cv2.polylines(frame, [polygon], True, (0, 200, 255), 2)
+                x, y = polygon[0]
+                cv2.putText(frame, f"{zone['name']}: {counts[zone['name']]}", (int(x) + 5, int(y) + 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+        
+        person_count = len(boxes)
+        
+        # Draw bounding boxes
+        for x1, y1, x2, y2, confidence in boxes:
+            # Draw bounding box
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+            
+            # Draw label with confidence
+            label = f"Person {confidence:.2f}"
+            label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+            cv2.rectangle(frame, (int(x1), int(y1) - label_size[1] - 10),
+                        (int(x1) + label_size[0], int(y1)), (0, 255, 0), -1)
+            cv2.putText(frame, label, (int(x1), int(y1) - 5),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
         
         # Draw person count in top-left corner
         count_text = f"People: {person_count}"
@@ -273,175 +590,290 @@ def detect_people(frame):
         cv2.putText(frame, count_text, (15, 35),
                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
         
-        # Send Telegram alert when person count changes
+        # Send Telegram alert when person count changes (zones have their own rules)
         current_time = time.time()
-        if person_count != previous_person_count:
-            if person_count > 0 and (current_time - last_alert_time) >= alert_cooldown:
+        if zones:
+            check_zone_alerts(current_time)
+        if person_count != previous_person_count or zone_counts != previous_zone_counts:
+            if not zones and person_count > 0 and (current_time - last_alert_time) >= alert_cooldown:
                 # People detected - send alert
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 message = f"🚨 <b>Person Detected!</b>\n\n"
                 message += f"👥 <b>Count:</b> {person_count} person(s)\n"
                 message += f"🕐 <b>Time:</b> {timestamp}\n"
-                message += f"📍 <b>Location:</b> VigilSense Monitoring Area\n\n"
-                message += f"⚠️ Check live feed: http://10.120.83.221:8080"
+                message += f"📍 <b>Location:</b> VigilSense Monitoring Area ({NODE_ID})\n\n"
+                message += f"⚠️ Check live feed: {PUBLIC_URL}"
                 
                 if send_telegram_alert(message):
                     print(f"✅ Telegram alert sent: {person_count} person(s) detected")
                     last_alert_time = current_time
                 else:
                     print(f"⚠️  Failed to send Telegram alert")
-            elif person_count == 0 and previous_person_count > 0:
+            elif not zones and person_count == 0 and previous_person_count > 0:
                 # All people left - send confirmation
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 message = f"✅ <b>Area Clear</b>\n\n"
                 message += f"👥 <b>Count:</b> 0 persons\n"
                 message += f"🕐 <b>Time:</b> {timestamp}\n"
-                message += f"📍 <b>Location:</b> VigilSense Monitoring Area"
+                message += f"📍 <b>Location:</b> VigilSense Monitoring Area ({NODE_ID})"
                 
                 if send_telegram_alert(message):
                     print(f"✅ Telegram alert sent: Area cleared")
                     last_alert_time = current_time
             
+            # Also relayed when people only move between zones
+            detection = f"People: {person_count}"
+            if zone_counts:
+                detection += " (" + ", ".join(f"{name}: {count}" for name, count in zone_counts.items()) + ")"
+            fleet_enqueue("event", {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "detection": detection,
+                "people": person_count,
+                "zones": dict(zone_counts)
+            })
             previous_person_count = person_count
+            previous_zone_counts = dict(zone_counts)
         
     except Exception as e:
         print(f"Error in YOLO detection: {e}")
     
     return frame
 
-def init_camera():
-    """Initialize Pi Camera v3 using rpicam-vid"""
-    global camera, camera_process
-    
-    # Kill any existing rpicam processes (from previous runs)
+def build_camera_command():
+    """Build the camera command line (VIGIL_CAMERA_CMD overrides it, e.g. with fake_camera.py)"""
+    override = os.environ.get('VIGIL_CAMERA_CMD')
+    if override:
+        return shlex.split(override)
+    # rpicam-vid outputs MJPEG stream which we'll read
+    return [
+        'rpicam-vid',
+        '--width', '640',
+        '--height', '480',
+        '--framerate', '24',
+        '--codec', 'mjpeg',
+        '--inline',
+        '--timeout', '0',
+        '--output', '-',
+        '--nopreview'
+    ]
+
+def drain_camera_stderr(process):
+    """Keep reading camera stderr so the pipe never fills up and blocks the camera"""
     try:
-        subprocess.run(['pkill', '-9', 'rpicam-vid'], stderr=subprocess.DEVNULL, timeout=2)
-        time.sleep(0.5)
-    except:
+        for raw_line in iter(process.stderr.readline, b''):
+            line = raw_line.decode('utf-8', errors='ignore').strip()
+            if line:
+                camera_stderr_tail.append(line)
+    except Exception:
         pass
+
+def read_camera_frames(process):
+    """Split the camera's MJPEG byte stream into JPEG frames and publish the latest one"""
+    global latest_jpeg, latest_frame_id
     
-    # Kill any existing camera_process
-    if camera_process:
-        try:
-            camera_process.terminate()
-            camera_process.wait(timeout=2)
-        except:
-            try:
-                camera_process.kill()
-            except:
-                pass
+    # Buffer for accumulating JPEG data
+    jpeg_buffer = bytearray()
     
-    try:
-        # Use rpicam-vid for Pi Camera v3
-        # rpicam-vid outputs MJPEG stream which we'll read
-        camera_process = subprocess.Popen(
-            [
-                'rpicam-vid',
-                '--width', '640',
-                '--height', '480',
-                '--framerate', '24',
-                '--codec', 'mjpeg',
-                '--inline',
-                '--timeout', '0',
-                '--output', '-',
-                '--nopreview'
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            bufsize=0  # Unbuffered
-        )
+    while True:
+        try:
+            chunk = process.stdout.read(8192)
+        except Exception:
+            break
+        if not chunk:
+            # EOF - process died or was stopped by the supervisor
+            break
         
-        # Wait a moment to see if process starts successfully
-        time.sleep(1)
-        if camera_process.poll() is None:
-            camera = True  # Mark as initialized
-            print("✅ Pi Camera v3 initialized with rpicam-vid")
-        else:
-            try:
-                stderr_output = camera_process.stderr.read().decode('utf-8', errors='ignore')
-                print(f"⚠️  rpicam-vid failed: {stderr_output[:300]}")
-            except:
-                pass
-            camera = None
-            try:
-                camera_process.terminate()
-            except:
-                pass
-            camera_process = None
-    except Exception as e:
-        print(f"Camera initialization error: {e}")
-        camera = None
-        camera_process = None
+        jpeg_buffer.extend(chunk)
+        
+        # Look for JPEG markers
+        while True:
+            # Find start marker
+            start_idx = jpeg_buffer.find(b'\xff\xd8')
+            if start_idx == -1:
+                # No start marker, keep only last 1000 bytes to avoid memory issues
+                if len(jpeg_buffer) > 1000:
+                    jpeg_buffer = jpeg_buffer[-1000:]
+                break
+            
+            # Find end marker after start
+            end_idx = jpeg_buffer.find(b'\xff\xd9', start_idx + 2)
+            if end_idx == -1:
+                # No end marker yet, need more data
+                break
+            
+            # Extract complete JPEG
+            jpeg_data = bytes(jpeg_buffer[start_idx:end_idx + 2])
+            jpeg_buffer = jpeg_buffer[end_idx + 2:]
+            
+            with camera_frame_condition:
+                latest_jpeg = jpeg_data
+                latest_frame_id += 1
+                camera_stats["frames"] += 1
+                camera_stats["last_frame_time"] = time.time()
+                camera_frame_condition.notify_all()
 
-def generate_frames():
-    """Generate camera frames for MJPEG stream using rpicam-vid"""
+def stop_camera_process(process):
+    """Stop our own camera process (never other processes on the system)"""
+    try:
+        process.terminate()
+        process.wait(timeout=2)
+    except Exception:
+        try:
+            process.kill()
+            process.wait(timeout=2)
+        except Exception:
+            pass
+
+def camera_supervisor():
+    """Thread function that owns the camera process lifecycle
+    Starts the camera, restarts it when it exits or stops delivering frames
+    (frame-arrival watchdog) and backs off exponentially between restarts.
+    Runs until camera_stop_event is set.
+    """
     global camera_process
     
-    # Buffer for accumulating JPEG data
-    jpeg_buffer = bytearray()
+    backoff = CAMERA_BACKOFF_INITIAL
     
-    while True:
-        if camera and camera_process and camera_process.poll() is None:
+    while not camera_stop_event.is_set():
+        started = time.time()
+        reason = None
+        # Restart reasons must only quote this run's stderr
+        camera_stderr_tail.clear()
+        try:
+            process = subprocess.Popen(
+                build_camera_command(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=0  # Unbuffered
+            )
+        except Exception as e:
+            process = None
+            reason = f"failed to start: {e}"
+        
+        if process:
+            camera_process = process
+            camera_stats["state"] = "starting"
+            camera_stats["started_at"] = started
+            reader = threading.Thread(target=read_camera_frames, args=(process,), daemon=True)
+            reader.start()
+            drainer = threading.Thread(target=drain_camera_stderr, args=(process,), daemon=True)
+            drainer.start()
+            
+            # Watchdog: restart on exit or when no frame arrived for CAMERA_STALL_TIMEOUT
+            while not camera_stop_event.wait(CAMERA_WATCHDOG_INTERVAL):
+                if process.poll() is not None:
+                    reason = f"exited with code {process.returncode}"
+                    break
+                last_frame_time = camera_stats["last_frame_time"] or 0
+                if time.time() - max(started, last_frame_time) > CAMERA_STALL_TIMEOUT:
+                    reason = f"stalled (no frames for {CAMERA_STALL_TIMEOUT:g}s)"
+                    break
+                if last_frame_time >= started and camera_stats["state"] != "running":
+                    camera_stats["state"] = "running"
+                    print("✅ Pi Camera v3 streaming")
+            
+            stop_camera_process(process)
+            reader.join(timeout=2)
+            drainer.join(timeout=2)
+            camera_process = None
+            if reason is None:
+                # Stopped on request
+                break
+            if camera_stderr_tail:
+                reason += f" - {camera_stderr_tail[-1][:200]}"
+        
+        # A run that stayed up long enough counts as healthy, so start backing off afresh
+        if time.time() - started >= CAMERA_BACKOFF_RESET:
+            backoff = CAMERA_BACKOFF_INITIAL
+        
+        camera_stats["state"] = "restarting"
+        camera_stats["started_at"] = None
+        camera_stats["last_error"] = reason
+        camera_stats["restarts"] += 1
+        camera_stats["backoff"] = backoff
+        print(f"⚠️  Camera {reason}; restarting in {backoff:.1f}s")
+        camera_stop_event.wait(backoff)
+        backoff = min(backoff * 2, CAMERA_BACKOFF_MAX)
+    
+    camera_stats["state"] = "stopped"
+
+def stop_camera():
+    """Stop the camera supervisor and its camera process (registered with atexit)"""
+    camera_stop_event.set()
+    process = camera_process
+    if process:
+        stop_camera_process(process)
+
+def process_camera_frames():
+    """Thread function that runs person detection once per new camera frame
+    Publishes the annotated, re-encoded frame that every stream viewer forwards.
+    Runs even with no viewers so headless nodes still count people and alert.
+    """
+    global annotated_jpeg, annotated_frame_id
+    last_frame_id = 0
+    
+    while not camera_stop_event.is_set():
+        with camera_frame_condition:
+            camera_frame_condition.wait_for(lambda: latest_frame_id != last_frame_id, timeout=1.0)
+            jpeg_data = latest_jpeg
+            frame_id = latest_frame_id
+        if jpeg_data is None or frame_id == last_frame_id:
+            continue
+        last_frame_id = frame_id
+        
+        if yolo_model is not None:
+            # Decode JPEG to numpy array for YOLO processing
             try:
-                # Read data from rpicam-vid
-                chunk = camera_process.stdout.read(8192)
-                if not chunk:
-                    # Restart camera process if it died
-                    init_camera()
-                    time.sleep(1)
-                    continue
-                
-                jpeg_buffer.extend(chunk)
+                nparr = np.frombuffer(jpeg_data, np.uint8)
+                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
                 
-                # Look for JPEG markers
-                while True:
-                    # Find start marker
-                    start_idx = jpeg_buffer.find(b'\xff\xd8')
-                    if start_idx == -1:
-                        # No start marker, keep only last 1000 bytes to avoid memory issues
-                        if len(jpeg_buffer) > 1000:
-                            jpeg_buffer = jpeg_buffer[-1000:]
-                        break
-                    
-                    # Find end marker after start
-                    end_idx = jpeg_buffer.find(b'\xff\xd9', start_idx + 2)
-                    if end_idx == -1:
-                        # No end marker yet, need more data
-                        break
-                    
-                    # Extract complete JPEG
-                    jpeg_data = bytes(jpeg_buffer[start_idx:end_idx + 2])
-                    jpeg_buffer = jpeg_buffer[end_idx + 2:]
-                    
-                    # Decode JPEG to numpy array for YOLO processing
-                    try:
-                        nparr = np.frombuffer(jpeg_data, np.uint8)
-                        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                        
-                        if frame is not None:
-                            # Run YOLO person detection
-                            frame = detect_people(frame)
-                            
-                            # Re-encode to JPEG (lower quality to reduce bandwidth/latency)
-                            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                            if ret:
-                                jpeg_data = buffer.tobytes()
-                    except Exception as e:
-                        # If processing fails, use original frame
-                        pass
-                    
-                    # Yield the frame
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data + b'\r\n')
+                if frame is not None:
+                    # Run YOLO person detection
+                    frame = detect_people(frame)
                     
+                    # Re-encode to JPEG (lower quality to reduce bandwidth/latency)
+                    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                    if ret:
+                        jpeg_data = buffer.tobytes()
             except Exception as e:
-                print(f"Error reading camera frame: {e}")
-                time.sleep(0.1)
-                # Try to restart camera
-                if camera_process and camera_process.poll() is not None:
-                    init_camera()
-                    time.sleep(1)
-        else:
+                # If processing fails, use original frame
+                print(f"Error processing camera frame: {e}")
+        
+        with annotated_frame_condition:
+            annotated_jpeg = jpeg_data
+            annotated_frame_id = frame_id
+            annotated_frame_condition.notify_all()
+
+def init_camera():
+    """Initialize Pi Camera v3 by starting the camera supervisor and detection threads"""
+    if 'VIGIL_CAMERA_CMD' not in os.environ:
+        # Kill rpicam processes left over from previous runs (once, at startup only)
+        try:
+            subprocess.run(['pkill', '-9', 'rpicam-vid'], stderr=subprocess.DEVNULL, timeout=2)
+            time.sleep(0.5)
+        except:
+            pass
+    
+    atexit.register(stop_camera)
+    supervisor_thread = threading.Thread(target=camera_supervisor, daemon=True)
+    supervisor_thread.start()
+    detection_thread = threading.Thread(target=process_camera_frames, daemon=True)
+    detection_thread.start()
+
+def generate_frames():
+    """Generate camera frames for MJPEG stream from the latest annotated frame"""
+    last_frame_id = 0
+    
+    while True:
+        with annotated_frame_condition:
+            annotated_frame_condition.wait_for(lambda: annotated_frame_id != last_frame_id, timeout=1.0)
+            jpeg_data = annotated_jpeg
+            frame_id = annotated_frame_id
+        
+        if frame_id == last_frame_id:
+            if jpeg_data is not None and camera_stats["state"] == "running":
+                # Camera is fine, detection is just slower than 1s: keep waiting
+                continue
             # Generate mock frame if camera not available
             frame = generate_mock_frame()
             ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
@@ -449,7 +881,270 @@ def generate_frames():
                 frame_bytes = buffer.tobytes()
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            time.sleep(0.033)  # ~30 FPS
+            continue
+        
+        last_frame_id = frame_id
+        
+        # Yield the frame
+        yield (b'--frame\r\n'
+               b'Content-Type: image/jpeg\r\n\r\n' + jpeg_data + b'\r\n')
+
+def get_local_ip():
+    """Best-effort LAN IP of this node (no packets are sent)"""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect(('8.8.8.8', 80))
+        ip = s.getsockname()[0]
+        s.close()
+        return ip
+    except Exception:
+        return '127.0.0.1'
+
+def fleet_enqueue(item_type, data):
+    """Queue a telemetry sample, event or thumbnail for the aggregator (store-and-forward)"""
+    global fleet_seq
+    if not FLEET_AGGREGATOR_URL:
+        return
+    with fleet_lock:
+        fleet_seq += 1
+        fleet_outbox.append({
+            "seq": fleet_seq,
+            "type": item_type,
+            "time": time.time(),
+            "data": data
+        })
+
+def make_thumbnail():
+    """Downscale the latest camera frame to a small base64 JPEG"""
+    jpeg_data = latest_jpeg
+    if jpeg_data is None or camera_stats["state"] != "running":
+        # Don't keep re-sending the last frame of a dead camera
+        return None
+    try:
+        frame = cv2.imdecode(np.frombuffer(jpeg_data, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            return None
+        frame = cv2.resize(frame, FLEET_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        if ret:
+            return base64.b64encode(buffer.tobytes()).decode('ascii')
+    except Exception as e:
+        print(f"Error creating fleet thumbnail: {e}")
+    return None
+
+def send_fleet_batch(batch):
+    """POST one gzip-compressed batch to the aggregator, returns True when acknowledged"""
+    payload = {
+        "node_id": NODE_ID,
+        "boot_id": FLEET_BOOT_ID,
+        "public_url": PUBLIC_URL,
+        "items": batch
+    }
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    if FLEET_TOKEN:
+        headers["X-Fleet-Token"] = FLEET_TOKEN
+    body = gzip.compress(json.dumps(payload).encode('utf-8'))
+    response = requests.post(f"{FLEET_AGGREGATOR_URL}/api/fleet/ingest", data=body, headers=headers, timeout=5)
+    if response.status_code != 200:
+        fleet_status["last_error"] = f"HTTP {response.status_code}: {response.text[:200]}"
+        return False
+    return True
+
+def flush_fleet_outbox():
+    """Send the oldest outbox items as one batch, dropping them only once acknowledged
+    Returns True when acknowledged, False on failure and None if nothing was queued.
+    """
+    with fleet_lock:
+        batch = list(itertools.islice(fleet_outbox, FLEET_BATCH_MAX))
+    if not batch:
+        return None
+    try:
+        ok = send_fleet_batch(batch)
+    except Exception as e:
+        ok = False
+        fleet_status["last_error"] = str(e)
+    if ok:
+        last_seq = batch[-1]["seq"]
+        with fleet_lock:
+            while fleet_outbox and fleet_outbox[0]["seq"] <= last_seq:
+                fleet_outbox.popleft()
+        fleet_status["connected"] = True
+        fleet_status["last_sent"] = time.time()
+        fleet_status["last_error"] = None
+    else:
+        if fleet_status["connected"]:
+            print(f"⚠️  Aggregator batch failed ({fleet_status['last_error']}), "
+                  f"buffering ({len(fleet_outbox)} items queued)")
+        fleet_status["connected"] = False
+    return ok
+
+def fleet_relay():
+    """Thread function that samples telemetry and ships batches to the aggregator
+    Items stay in the outbox until the aggregator acknowledges them, so nothing is
+    lost while the link is down (oldest items are dropped once the outbox is full).
+    """
+    next_sample = 0
+    next_thumbnail = 0
+    next_send = 0
+    backoff = FLEET_BATCH_INTERVAL
+    
+    while True:
+        now = time.time()
+        
+        if now >= next_sample:
+            fleet_enqueue("telemetry", dict(sensor_data, people=person_count, zones=dict(zone_counts),
+                                            camera=camera_stats["state"]))
+            next_sample = now + FLEET_SAMPLE_INTERVAL
+        
+        if now >= next_thumbnail:
+            thumbnail = make_thumbnail()
+            if thumbnail:
+                with fleet_lock:
+                    # Only the newest thumbnail is worth forwarding
+                    for item in list(fleet_outbox):
+                        if item["type"] == "thumbnail":
+                            fleet_outbox.remove(item)
+                fleet_enqueue("thumbnail", thumbnail)
+            next_thumbnail = now + FLEET_THUMBNAIL_INTERVAL
+        
+        if now >= next_send:
+            ok = flush_fleet_outbox()
+            if ok is None:
+                next_send = now + FLEET_BATCH_INTERVAL
+            elif ok:
+                backoff = FLEET_BATCH_INTERVAL
+                # Drain a backlog without waiting for the next interval
+                next_send = now if len(fleet_outbox) >= FLEET_BATCH_MAX else now + backoff
+            else:
+                backoff = min(backoff * 2, FLEET_BACKOFF_MAX)
+                next_send = now + backoff
+        
+        time.sleep(0.2)
+
+def reject_non_finite(value):
+    """json.loads hook: NaN/Infinity would be echoed back as invalid JSON by jsonify"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"Non-finite number: {value}")
+    return number
+
+def parse_fleet_body(body, gzipped):
+    """Decompress (bounded by FLEET_MAX_BATCH_BYTES) and parse a fleet batch"""
+    if gzipped:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = decompressor.decompress(body, FLEET_MAX_BATCH_BYTES)
+        if decompressor.unconsumed_tail or not decompressor.eof:
+            raise ValueError(f"Batch is truncated or larger than {FLEET_MAX_BATCH_BYTES} bytes uncompressed")
+    return json.loads(body, parse_float=reject_non_finite, parse_constant=reject_non_finite)
+
+def validate_fleet_batch(payload):
+    """Check a whole batch before anything is applied, raises ValueError if malformed
+    Returns (node_id, boot_id, public_url, items) with items sorted by seq and
+    thumbnails already decoded.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Batch must be a JSON object")
+    node_id = payload.get("node_id")
+    if not isinstance(node_id, str) or not FLEET_NODE_ID_PATTERN.match(node_id):
+        raise ValueError("Invalid 'node_id' (1-64 letters, digits, '.', '_' or '-')")
+    public_url = payload.get("public_url")
+    if not (isinstance(public_url, str) and public_url.startswith(('http://', 'https://'))):
+        # Only plain web links are shown on the fleet page
+        public_url = None
+    boot_id = payload.get("boot_id")
+    if not isinstance(boot_id, str) or not 1 <= len(boot_id) <= 64:
+        raise ValueError("Invalid 'boot_id' (1-64 character string)")
+    items = payload.get("items")
+    if not isinstance(items, list):
+        raise ValueError("Missing 'items' list")
+    if len(items) > FLEET_BATCH_MAX:
+        raise ValueError(f"Too many items (max {FLEET_BATCH_MAX})")
+    
+    checked = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("Batch item must be an object")
+        seq = item.get("seq")
+        item_type = item.get("type")
+        data = item.get("data")
+        if not isinstance(seq, int) or isinstance(seq, bool) or seq < 1:
+            raise ValueError(f"Invalid item seq: {seq!r}")
+        item_time = item.get("time")
+        if (not isinstance(item_time, (int, float)) or isinstance(item_time, bool)
+                or not math.isfinite(item_time)):
+            raise ValueError(f"Item {seq}: invalid 'time'")
+        if item_type in ("telemetry", "event"):
+            if not isinstance(data, dict):
+                raise ValueError(f"Item {seq}: '{item_type}' data must be an object")
+        elif item_type == "thumbnail":
+            if not isinstance(data, str):
+                raise ValueError(f"Item {seq}: thumbnail data must be a base64 string")
+            try:
+                data = base64.b64decode(data, validate=True)
+            except Exception:
+                raise ValueError(f"Item {seq}: thumbnail is not valid base64")
+        else:
+            raise ValueError(f"Item {seq}: unknown type {item_type!r}")
+        checked.append({"seq": seq, "type": item_type, "time": item["time"], "data": data})
+    
+    checked.sort(key=lambda i: i["seq"])
+    return node_id, boot_id, public_url, checked
+
+def merge_fleet_batch(payload):
+    """Merge one node's batch into the aggregator's per-node view"""
+    node_id, boot_id, public_url, items = validate_fleet_batch(payload)
+    
+    with fleet_lock:
+        node = fleet_nodes.get(node_id)
+        if node is None or node["boot_id"] != boot_id:
+            # New node or node restarted: its sequence numbers start over
+            previous = node or {}
+            node = {
+                "boot_id": boot_id,
+                "last_seq": 0,
+                "telemetry": previous.get("telemetry", deque(maxlen=FLEET_NODE_TELEMETRY_MAX)),
+                "events": previous.get("events", deque(maxlen=FLEET_NODE_EVENTS_MAX)),
+                "latest": previous.get("latest", {}),
+                "thumbnail": previous.get("thumbnail"),
+                "thumbnail_time": previous.get("thumbnail_time")
+            }
+            fleet_nodes[node_id] = node
+        node["public_url"] = public_url
+        node["last_seen"] = time.time()
+        
+        accepted = 0
+        for item in items:
+            if item["seq"] <= node["last_seq"]:
+                # Resent after a lost acknowledgement
+                continue
+            node["last_seq"] = item["seq"]
+            accepted += 1
+            if item["type"] == "telemetry":
+                sample = dict(item["data"], time=item["time"])
+                node["telemetry"].append(sample)
+                node["latest"] = sample
+            elif item["type"] == "event":
+                node["events"].appendleft(dict(item["data"], time=item["time"]))
+            elif item["type"] == "thumbnail":
+                node["thumbnail"] = item["data"]
+                node["thumbnail_time"] = item["time"]
+        return accepted
+
+def fleet_node_summary(node_id, node):
+    """Summary of one node for the fleet overview"""
+    latest = node["latest"]
+    return {
+        "node_id": node_id,
+        "online": time.time() - node["last_seen"] < FLEET_NODE_OFFLINE_AFTER,
+        "last_seen": round(node["last_seen"], 1),
+        "public_url": node.get("public_url"),
+        "sensors": {key: latest.get(key) for key in sensor_data},
+        "people": latest.get("people", 0),
+        "zones": latest.get("zones", {}),
+        "camera": latest.get("camera"),
+        "events": len(node["events"]),
+        "has_thumbnail": node["thumbnail"] is not None
+    }
 
 def generate_mock_frame():
     """Generate a mock frame when camera is not available"""
@@ -511,13 +1206,105 @@ def arduino_status():
         "port": arduino_port
     })
 
+@app.route('/api/camera/status')
+def camera_status():
+    """Get camera supervisor status (restarts, uptime, frame watchdog)"""
+    now = time.time()
+    started_at = camera_stats["started_at"]
+    last_frame_time = camera_stats["last_frame_time"]
+    return jsonify({
+        "connected": camera_stats["state"] == "running",
+        "state": camera_stats["state"],
+        "restarts": camera_stats["restarts"],
+        "uptime": round(now - started_at, 1) if started_at else 0,
+        "frames": camera_stats["frames"],
+        "last_frame_age": round(now - last_frame_time, 1) if last_frame_time else None,
+        "last_error": camera_stats["last_error"],
+        "backoff": camera_stats["backoff"],
+        "stderr": list(camera_stderr_tail)[-5:]
+    })
+
 @app.route('/api/people')
 def get_people_count():
     """Get current person count from YOLO detection"""
     return jsonify({
         "count": person_count,
         "yolo_enabled": yolo_model is not None,
-        "telegram_enabled": TELEGRAM_ENABLED
+        "telegram_enabled": TELEGRAM_ENABLED,
+        "camera_id": CAMERA_ID,
+        "zones": [
+            {
+                "name": zone["name"],
+                "count": zone_counts.get(zone["name"], 0),
+                "alert": zone["alert"],
+                "alert_min": zone["alert_min"],
+                "alert_active": zone_alert_state.get(zone["name"], {}).get("active", False)
+            }
+            for zone in zones
+        ],
+        "inference_mode": inference_mode,
+        "inference_pixels": inference_pixels
+    })
+
+@app.route('/fleet')
+def fleet():
+    """Render the fleet overview page (aggregator)"""
+    return render_template('fleet.html')
+
+@app.route('/api/fleet/ingest', methods=['POST'])
+def fleet_ingest():
+    """Receive a compressed batch of telemetry, events and thumbnails from a node"""
+    if not FLEET_AGGREGATOR:
+        return jsonify({"status": "error", "message": "Not a fleet aggregator (set VIGIL_FLEET_AGGREGATOR=1)"}), 403
+    if FLEET_TOKEN and not hmac.compare_digest(request.headers.get('X-Fleet-Token', ''), FLEET_TOKEN):
+        return jsonify({"status": "error", "message": "Invalid fleet token"}), 403
+    # Over MAX_CONTENT_LENGTH, Flask answers 413 here
+    body = request.get_data()
+    try:
+        payload = parse_fleet_body(body, request.headers.get('Content-Encoding') == 'gzip')
+        accepted = merge_fleet_batch(payload)
+        return jsonify({"status": "success", "accepted": accepted})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+@app.route('/api/fleet/nodes')
+def fleet_nodes_list():
+    """Get a summary of every node reporting to this aggregator"""
+    with fleet_lock:
+        nodes = [fleet_node_summary(node_id, node) for node_id, node in sorted(fleet_nodes.items())]
+    return jsonify(nodes)
+
+@app.route('/api/fleet/nodes/<node_id>')
+def fleet_node_detail(node_id):
+    """Get telemetry history and events for one node"""
+    with fleet_lock:
+        node = fleet_nodes.get(node_id)
+        if node is None:
+            return jsonify({"status": "error", "message": "Unknown node"}), 404
+        detail = fleet_node_summary(node_id, node)
+        detail["telemetry"] = list(node["telemetry"])
+        detail["events"] = list(node["events"])
+    return jsonify(detail)
+
+@app.route('/api/fleet/nodes/<node_id>/thumbnail.jpg')
+def fleet_node_thumbnail(node_id):
+    """Latest thumbnail frame relayed by a node"""
+    node = fleet_nodes.get(node_id)
+    if node is None or node["thumbnail"] is None:
+        return jsonify({"status": "error", "message": "No thumbnail"}), 404
+    return Response(node["thumbnail"], mimetype='image/jpeg')
+
+@app.route('/api/fleet/relay')
+def fleet_relay_status():
+    """Get this node's relay status (store-and-forward queue)"""
+    return jsonify({
+        "enabled": bool(FLEET_AGGREGATOR_URL),
+        "node_id": NODE_ID,
+        "aggregator": FLEET_AGGREGATOR_URL or None,
+        "connected": fleet_status["connected"],
+        "queued": len(fleet_outbox),
+        "last_sent": fleet_status["last_sent"],
+        "last_error": fleet_status["last_error"]
     })
 
 @app.route('/api/telegram/status')
@@ -550,14 +1337,21 @@ def test_telegram():
         return jsonify({"status": "error", "message": "Telegram not configured or failed to send"}), 400
 
 if __name__ == '__main__':
+    if not PUBLIC_URL:
+        PUBLIC_URL = f"http://{get_local_ip()}:{PORT}"
+    
     # Initialize hardware
     print("🔧 Initializing VigilSense Hardware...")
     
     # Initialize YOLO model
     print("🤖 Loading YOLOv8 model for person detection...")
     init_yolo()
+    load_zones()
     
-    # Initialize camera
+    # Exit normally on SIGTERM (systemd, kill) so atexit stops rpicam-vid
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    # Initialize camera (supervisor thread owns rpicam-vid from here on)
     init_camera()
     
     # Initialize Arduino
@@ -567,11 +1361,18 @@ if __name__ == '__main__':
     sensor_thread = threading.Thread(target=read_arduino_sensors, daemon=True)
     sensor_thread.start()
     
+    # Start fleet relay thread (only when reporting to an aggregator)
+    if FLEET_AGGREGATOR_URL:
+        relay_thread = threading.Thread(target=fleet_relay, daemon=True)
+        relay_thread.start()
+    
     # Run Flask app
     print("🚀 Starting VigilSense Dashboard...")
     print(f"📡 Arduino: {'✅ Connected' if arduino and arduino.is_open else '❌ Not Connected'}")
-    print(f"📷 Camera: {'✅ Connected' if camera and camera_process and camera_process.poll() is None else '❌ Not Connected'}")
-    print("🌐 Access at: http://localhost:8080")
-    print("📊 Or network: http://<raspberry-pi-ip>:8080")
+    print(f"📷 Camera: supervisor {camera_stats['state']} (status at /api/camera/status)")
+    print(f"🛰️  Node: {NODE_ID}" + (f" → relaying to {FLEET_AGGREGATOR_URL}" if FLEET_AGGREGATOR_URL else ""))
+    print(f"🌐 Access at: http://localhost:{PORT}")
+    print(f"📊 Or network: {PUBLIC_URL}")
     
-    app.run(host='0.0.0.0', port=8080, debug=True, threaded=True)
+    # No reloader: it would start a second copy of the camera supervisor and relay threads
+    app.run(host='0.0.0.0', port=PORT, debug=True, threaded=True, use_reloader=False)
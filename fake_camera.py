@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fake camera for testing the camera supervisor without a Pi Camera
+Emits an MJPEG stream on stdout like rpicam-vid, and can die or stall on cue
+
+Usage:
+    VIGIL_CAMERA_CMD="python3 fake_camera.py --die-after 50" python3 app.py
+    VIGIL_CAMERA_CMD="python3 fake_camera.py --stall-after 50" python3 app.py
+"""
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+def make_frame(width, height, index):
+    """Render a numbered test frame"""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.putText(frame, f"Fake camera frame {index}", (20, height // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    return buffer.tobytes()
+
+def main():
+    parser = argparse.ArgumentParser(description="Emit a fake MJPEG camera stream on stdout")
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--framerate', type=float, default=24)
+    parser.add_argument('--die-after', type=int, default=0,
+                        help="Exit with code 1 after this many frames (0 = never)")
+    parser.add_argument('--stall-after', type=int, default=0,
+                        help="Stop sending frames but keep running after this many frames (0 = never)")
+    args = parser.parse_args()
+
+    print(f"fake_camera: {args.width}x{args.height} @ {args.framerate} fps", file=sys.stderr, flush=True)
+    out = sys.stdout.buffer
+    index = 0
+    while True:
+        if args.die_after and index >= args.die_after:
+            print("fake_camera: dying on cue", file=sys.stderr, flush=True)
+            sys.exit(1)
+        if args.stall_after and index >= args.stall_after:
+            print("fake_camera: stalling on cue", file=sys.stderr, flush=True)
+            while True:
+                time.sleep(60)
+        try:
+            out.write(make_frame(args.width, args.height, index))
+            out.flush()
+        except BrokenPipeError:
+            return
+        index += 1
+        time.sleep(1.0 / args.framerate)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Tests for the camera supervisor using fake_camera.py instead of rpicam-vid
+Run with: python -m pytest test_camera_supervisor.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("cv2")
+
+import app
+
+FAKE_CAMERA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_camera.py")
+
+@pytest.fixture
+def supervisor(monkeypatch):
+    """Start camera_supervisor with short timeouts; yields a function that starts it"""
+    monkeypatch.setattr(app, "CAMERA_WATCHDOG_INTERVAL", 0.05)
+    monkeypatch.setattr(app, "CAMERA_STALL_TIMEOUT", 0.5)
+    monkeypatch.setattr(app, "CAMERA_BACKOFF_INITIAL", 0.1)
+    monkeypatch.setattr(app, "CAMERA_BACKOFF_MAX", 10.0)
+    monkeypatch.setattr(app, "camera_stats", dict(app.camera_stats, restarts=0, frames=0,
+                                                  last_error=None, backoff=None))
+    app.camera_stop_event.clear()
+    threads = []
+
+    def start(*fake_args):
+        command = " ".join([sys.executable, FAKE_CAMERA, "--framerate", "50"] + list(fake_args))
+        monkeypatch.setenv("VIGIL_CAMERA_CMD", command)
+        thread = threading.Thread(target=app.camera_supervisor, daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    yield start
+
+    app.stop_camera()
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+def wait_for_restarts(count, timeout=15):
+    """Poll camera_stats until `count` restarts happened, recording each backoff"""
+    backoffs = {}
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        restarts = app.camera_stats["restarts"]
+        if restarts:
+            backoffs.setdefault(restarts, app.camera_stats["backoff"])
+        if restarts >= count:
+            return [backoffs[i] for i in sorted(backoffs)]
+        time.sleep(0.01)
+    pytest.fail(f"only {app.camera_stats['restarts']} restarts after {timeout}s")
+
+def test_restarts_when_camera_dies(supervisor):
+    supervisor("--die-after", "5")
+    backoffs = wait_for_restarts(3)
+
+    assert app.camera_stats["last_error"].startswith("exited with code 1")
+    assert "dying on cue" in app.camera_stats["last_error"]
+    assert app.camera_stats["frames"] >= 5
+    assert backoffs[:3] == [0.1, 0.2, 0.4]
+
+def test_restarts_when_camera_stalls(supervisor):
+    supervisor("--stall-after", "5")
+    backoffs = wait_for_restarts(2)
+
+    assert app.camera_stats["last_error"].startswith("stalled")
+    assert backoffs[:2] == [0.1, 0.2]
+
+def test_stop_camera_stops_child_process(supervisor):
+    supervisor()
+    deadline = time.time() + 10
+    while app.camera_stats["state"] != "running" and time.time() < deadline:
+        time.sleep(0.05)
+    process = app.camera_process
+    assert process is not None
+
+    app.stop_camera()
+    process.wait(timeout=5)
+    assert process.poll() is not None
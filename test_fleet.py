@@ -0,0 +1,178 @@
+"""
+Tests for the fleet relay and aggregator
+Run with: python -m pytest test_fleet.py
+"""
+
+import gzip
+import json
+import zlib
+from collections import deque
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("cv2")
+
+import app
+
+@pytest.fixture
+def aggregator(monkeypatch):
+    """Test client for an instance configured as aggregator, with empty fleet state"""
+    monkeypatch.setattr(app, "FLEET_AGGREGATOR", True)
+    monkeypatch.setattr(app, "FLEET_TOKEN", "")
+    monkeypatch.setattr(app, "fleet_nodes", {})
+    return app.app.test_client()
+
+def make_batch(seqs, boot_id="boot-1", node_id="bot1", **overrides):
+    """A batch of telemetry items with the given sequence numbers"""
+    batch = {
+        "node_id": node_id,
+        "boot_id": boot_id,
+        "public_url": "http://10.0.0.5:8080",
+        "items": [{"seq": seq, "type": "telemetry", "time": 1000.0 + seq, "data": {"gas": seq}}
+                  for seq in seqs]
+    }
+    batch.update(overrides)
+    return batch
+
+def post(client, batch, headers=None):
+    """POST a batch gzip-compressed, like the relay does"""
+    body = gzip.compress(json.dumps(batch).encode("utf-8"))
+    all_headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    all_headers.update(headers or {})
+    return client.post("/api/fleet/ingest", data=body, headers=all_headers)
+
+def post_raw(client, body):
+    """POST raw JSON bytes gzip-compressed"""
+    return client.post("/api/fleet/ingest", data=gzip.compress(body),
+                       headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+
+def test_resent_batch_is_idempotent(aggregator):
+    assert post(aggregator, make_batch([1, 2, 3])).json["accepted"] == 3
+    response = post(aggregator, make_batch([2, 3, 4]))
+
+    assert response.status_code == 200
+    assert response.json["accepted"] == 1
+    node = app.fleet_nodes["bot1"]
+    assert node["last_seq"] == 4
+    assert [sample["gas"] for sample in node["telemetry"]] == [1, 2, 3, 4]
+
+def test_new_boot_id_resets_seq(aggregator):
+    post(aggregator, make_batch([1, 2, 3]))
+    response = post(aggregator, make_batch([1, 2], boot_id="boot-2"))
+
+    assert response.json["accepted"] == 2
+    node = app.fleet_nodes["bot1"]
+    assert node["boot_id"] == "boot-2"
+    assert node["last_seq"] == 2
+    # History from the previous boot is kept
+    assert len(node["telemetry"]) == 5
+
+def test_malformed_batch_is_rejected_whole(aggregator):
+    post(aggregator, make_batch([1]))
+    batch = make_batch([2, 3])
+    batch["items"][1] = {"seq": 3, "type": "event", "time": 1003.0, "data": "str"}
+    response = post(aggregator, batch)
+
+    assert response.status_code == 400
+    node = app.fleet_nodes["bot1"]
+    assert node["last_seq"] == 1
+    assert len(node["telemetry"]) == 1
+    # The corrected resend is not treated as a duplicate
+    assert post(aggregator, make_batch([2, 3])).json["accepted"] == 2
+
+@pytest.mark.parametrize("batch", [
+    make_batch([1], boot_id=["not", "a", "string"]),
+    make_batch([1], node_id="<img src=x onerror=alert(1)>"),
+    make_batch([True]),
+    make_batch(range(1, app.FLEET_BATCH_MAX + 2)),
+])
+def test_invalid_batches_are_rejected(aggregator, batch):
+    assert post(aggregator, batch).status_code == 400
+    assert app.fleet_nodes == {}
+
+@pytest.mark.parametrize("time_value", ["NaN", "Infinity", "1e400"])
+def test_non_finite_numbers_are_rejected(aggregator, time_value):
+    body = json.dumps(make_batch([1])).replace("1001.0", time_value)
+    response = post_raw(aggregator, body.encode("utf-8"))
+
+    assert response.status_code == 400
+    assert app.fleet_nodes == {}
+
+def test_gzip_bomb_is_rejected(aggregator):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    bomb = compressor.compress(b" " * (app.FLEET_MAX_BATCH_BYTES + 1)) + compressor.flush()
+    assert len(bomb) < app.FLEET_MAX_REQUEST_BYTES
+    response = aggregator.post("/api/fleet/ingest", data=bomb,
+                               headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+
+    assert response.status_code == 400
+    assert "larger than" in response.json["message"]
+
+def test_oversized_request_is_rejected(aggregator):
+    body = b"x" * (app.FLEET_MAX_REQUEST_BYTES + 1)
+    response = aggregator.post("/api/fleet/ingest", data=body, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+
+def test_ingest_requires_aggregator_mode(aggregator, monkeypatch):
+    monkeypatch.setattr(app, "FLEET_AGGREGATOR", False)
+    assert post(aggregator, make_batch([1])).status_code == 403
+    assert app.fleet_nodes == {}
+
+def test_ingest_checks_token(aggregator, monkeypatch):
+    monkeypatch.setattr(app, "FLEET_TOKEN", "secret")
+    assert post(aggregator, make_batch([1])).status_code == 403
+    assert post(aggregator, make_batch([1]), {"X-Fleet-Token": "wrong"}).status_code == 403
+    assert post(aggregator, make_batch([1]), {"X-Fleet-Token": "secret"}).status_code == 200
+
+def test_node_summary_shows_zone_counts(aggregator):
+    batch = make_batch([1])
+    batch["items"][0]["data"] = {"gas": 1, "people": 2, "zones": {"gate": 2}}
+    post(aggregator, batch)
+
+    summary = aggregator.get("/api/fleet/nodes").json[0]
+    assert summary["people"] == 2
+    assert summary["zones"] == {"gate": 2}
+
+@pytest.fixture
+def relay(monkeypatch):
+    """Relay node with an empty outbox; returns monkeypatch for stubbing the sender"""
+    monkeypatch.setattr(app, "FLEET_AGGREGATOR_URL", "http://aggregator:8080")
+    monkeypatch.setattr(app, "fleet_outbox", deque(maxlen=app.FLEET_OUTBOX_MAX))
+    monkeypatch.setattr(app, "fleet_status", {"connected": False, "last_sent": None, "last_error": None})
+    return monkeypatch
+
+def test_relay_keeps_items_until_acknowledged(relay):
+    sent = []
+    acks = iter([False, True])
+
+    def fake_send(batch):
+        sent.append([item["seq"] for item in batch])
+        return next(acks)
+
+    relay.setattr(app, "send_fleet_batch", fake_send)
+    for value in range(3):
+        app.fleet_enqueue("telemetry", {"gas": value})
+    seqs = [item["seq"] for item in app.fleet_outbox]
+
+    assert app.flush_fleet_outbox() is False
+    assert len(app.fleet_outbox) == 3
+
+    # Items queued while the link was down go out with the resend
+    app.fleet_enqueue("telemetry", {"gas": 3})
+    assert app.flush_fleet_outbox() is True
+    assert len(app.fleet_outbox) == 0
+    assert sent[0] == seqs
+    assert sent[1] == seqs + [seqs[-1] + 1]
+    assert app.flush_fleet_outbox() is None
+
+def test_relay_records_send_errors(relay):
+    def failing_send(batch):
+        raise ConnectionError("aggregator down")
+
+    relay.setattr(app, "send_fleet_batch", failing_send)
+    app.fleet_enqueue("event", {"detection": "Gas Leak"})
+
+    assert app.flush_fleet_outbox() is False
+    assert app.fleet_status["last_error"] == "aggregator down"
+    assert len(app.fleet_outbox) == 1
@@ -0,0 +1,180 @@
+"""
+Tests for zone-based region-of-interest detection, using a stub instead of YOLO
+Run with: python -m pytest test_zones.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("cv2")
+
+import app
+
+WIDTH, HEIGHT = 640, 480
+
+PERIMETER = {"name": "perimeter", "points": [[0.0, 0.85], [1.0, 0.85], [1.0, 1.0], [0.0, 1.0]]}
+GATE = {"name": "gate", "points": [[0.70, 0.15], [0.85, 0.15], [0.85, 0.30], [0.70, 0.30]]}
+
+class FakeTensor:
+    def __init__(self, values):
+        self.values = np.array(values, dtype=float)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+class FakeBox:
+    def __init__(self, xyxy, confidence):
+        self.xyxy = [FakeTensor(xyxy)]
+        self.conf = [FakeTensor(confidence)]
+
+class FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+class FakeModel:
+    """Reports fixed people (frame coordinates) in every image that fully contains them"""
+
+    def __init__(self, people):
+        self.people = people
+        self.calls = []
+
+    def __call__(self, source, **kwargs):
+        self.calls.append((source, kwargs))
+        if isinstance(source, list):
+            # Zone crops: find where each crop came from to shift the boxes into crop coordinates
+            tiles = app.plan_zone_inference(WIDTH, HEIGHT)[0]
+        else:
+            tiles = [(0, 0, WIDTH, HEIGHT)]
+        results = []
+        for x1, y1, x2, y2 in tiles:
+            boxes = [FakeBox([px1 - x1, py1 - y1, px2 - x1, py2 - y1], 0.9)
+                     for px1, py1, px2, py2 in self.people
+                     if px1 >= x1 and py1 >= y1 and px2 <= x2 and py2 <= y2]
+            results.append(FakeResult(boxes))
+        return results
+
+@pytest.fixture
+def zones(tmp_path, monkeypatch):
+    """Load the given zones from a temporary zones file; returns a loader function"""
+    monkeypatch.setattr(app, "ZONES_FILE", str(tmp_path / "zones.json"))
+    monkeypatch.setattr(app, "zones", [])
+    monkeypatch.setattr(app, "zone_counts", {})
+    monkeypatch.setattr(app, "previous_zone_counts", {})
+    monkeypatch.setattr(app, "zone_alert_state", {})
+    monkeypatch.setattr(app, "zone_plan_cache", {})
+    monkeypatch.setattr(app, "person_count", 0)
+    monkeypatch.setattr(app, "previous_person_count", 0)
+    monkeypatch.setattr(app, "send_telegram_alert", lambda message: True)
+
+    def load(*zone_list):
+        with open(app.ZONES_FILE, "w") as f:
+            json.dump({app.CAMERA_ID: list(zone_list)}, f)
+        app.load_zones()
+
+    return load
+
+def frame():
+    return np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+def test_tile_spans_widen_short_ranges_to_a_full_tile():
+    assert app.tile_spans(300, 50, WIDTH) == [(165, 485)]
+    # Clamped to the frame edges
+    assert app.tile_spans(0, 50, WIDTH) == [(0, 320)]
+    assert app.tile_spans(600, 40, WIDTH) == [(320, 640)]
+    # Frames smaller than a tile use the whole frame
+    assert app.tile_spans(10, 20, 200) == [(0, 200)]
+
+def test_tile_spans_cover_long_ranges_with_overlap():
+    spans = app.tile_spans(0, WIDTH, WIDTH)
+
+    assert spans[0][0] == 0 and spans[-1][1] == WIDTH
+    assert all(end - start == app.ZONE_TILE_SIZE for start, end in spans)
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert end - start >= app.ZONE_TILE_OVERLAP
+
+def test_zone_rects_pad_upward_and_clamp(zones):
+    zones(PERIMETER)
+    rects = app.zone_rects(app.zone_polygons(WIDTH, HEIGHT), WIDTH, HEIGHT)
+
+    pad_up = int(app.ZONE_PERSON_HEIGHT * HEIGHT)
+    assert rects == [(0, int(0.85 * HEIGHT) - pad_up, WIDTH, HEIGHT)]
+
+def test_zone_rects_merge_overlapping_zones(zones):
+    left = {"name": "left", "points": [[0.1, 0.8], [0.4, 0.8], [0.4, 0.9], [0.1, 0.9]]}
+    right = {"name": "right", "points": [[0.35, 0.8], [0.6, 0.8], [0.6, 0.9], [0.35, 0.9]]}
+    zones(left, right, GATE)
+    rects = app.zone_rects(app.zone_polygons(WIDTH, HEIGHT), WIDTH, HEIGHT)
+
+    assert len(rects) == 2
+    merged = [rect for rect in rects if rect[0] < int(0.35 * WIDTH)][0]
+    assert merged[0] == int(0.1 * WIDTH) - int(app.ZONE_PADDING * WIDTH)
+    # cv2.boundingRect includes the edge pixel
+    assert merged[2] == int(0.6 * WIDTH) + 1 + int(app.ZONE_PADDING * WIDTH)
+
+def test_perimeter_strip_uses_tiles(zones):
+    zones(PERIMETER)
+    tiles, model_pixels = app.plan_zone_inference(WIDTH, HEIGHT)
+
+    assert tiles is not None
+    assert all(x2 - x1 == app.ZONE_TILE_SIZE and y2 - y1 == app.ZONE_TILE_SIZE for x1, y1, x2, y2 in tiles)
+    assert model_pixels == len(tiles) * app.ZONE_TILE_SIZE ** 2
+
+def test_zones_covering_the_frame_fall_back_to_whole_frame(zones):
+    left = {"name": "left", "points": [[0.0, 0.0], [0.6, 0.0], [0.6, 1.0], [0.0, 1.0]]}
+    right = {"name": "right", "points": [[0.4, 0.0], [1.0, 0.0], [1.0, 1.0], [0.4, 1.0]]}
+    zones(left, right)
+
+    assert app.plan_zone_inference(WIDTH, HEIGHT) == (None, app.letterboxed_pixels(WIDTH, HEIGHT, app.DETECT_IMGSZ))
+    assert app.letterboxed_pixels(WIDTH, HEIGHT, app.DETECT_IMGSZ) == 480 * 384
+
+def test_detect_people_counts_feet_in_zones(zones, monkeypatch):
+    zones(PERIMETER, GATE)
+    people = [
+        (100, 300, 140, 440),  # Feet in the perimeter strip
+        (280, 310, 310, 445),  # Feet in the perimeter strip, on a tile seam
+        (470, 40, 500, 130),   # Feet in the gate
+        (200, 150, 230, 260),  # Outside every zone
+    ]
+    model = FakeModel(people)
+    monkeypatch.setattr(app, "yolo_model", model)
+
+    app.detect_people(frame())
+
+    source, kwargs = model.calls[-1]
+    assert isinstance(source, list) and kwargs["imgsz"] == app.ZONE_TILE_SIZE
+    assert len(model.calls) == 1
+    assert app.zone_counts == {"perimeter": 2, "gate": 1}
+    assert app.person_count == 3
+    assert app.inference_mode == "zones"
+
+def test_moving_between_zones_relays_an_event(zones, monkeypatch):
+    zones(PERIMETER, GATE)
+    events = []
+    monkeypatch.setattr(app, "fleet_enqueue", lambda item_type, data: events.append(data))
+
+    monkeypatch.setattr(app, "yolo_model", FakeModel([(100, 300, 140, 440)]))
+    app.detect_people(frame())
+    monkeypatch.setattr(app, "yolo_model", FakeModel([(470, 40, 500, 130)]))
+    app.detect_people(frame())
+
+    assert app.person_count == 1
+    assert [event["zones"] for event in events] == [
+        {"perimeter": 1, "gate": 0},
+        {"perimeter": 0, "gate": 1},
+    ]
+
+def test_api_people_reports_zones(zones, monkeypatch):
+    zones(PERIMETER, GATE)
+    monkeypatch.setattr(app, "yolo_model", FakeModel([(470, 40, 500, 130)]))
+    app.detect_people(frame())
+
+    data = app.app.test_client().get("/api/people").json
+    assert {zone["name"]: zone["count"] for zone in data["zones"]} == {"perimeter": 0, "gate": 1}
+    assert data["inference_mode"] == "zones"
+    assert data["inference_pixels"] == app.plan_zone_inference(WIDTH, HEIGHT)[1]